@@ -0,0 +1,2 @@
+# Having a conftest.py at the repository root puts the root on sys.path, so
+# the tests can import twitter_scraper when run with plain `pytest`.
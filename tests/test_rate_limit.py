@@ -0,0 +1,99 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("twikit")
+pytest.importorskip("dotenv")
+
+from twikit.errors import TooManyRequests
+
+import twitter_scraper
+from twitter_scraper import TwitterScraper
+
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    # Keep output/ and rate_state.json out of the working tree, and drop the
+    # random jitter so requests don't sleep
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(twitter_scraper.random, "uniform", lambda a, b: 0)
+    return TwitterScraper()
+
+
+def test_retry_delay_prefers_retry_after(scraper):
+    error = TooManyRequests(
+        "rate limited",
+        headers={"retry-after": "30", "x-rate-limit-reset": str(int(time.time()))},
+    )
+    assert scraper.retry_delay(error) == 30
+
+
+def test_retry_delay_uses_rate_limit_reset(scraper):
+    reset = int(time.time()) + 60
+    error = TooManyRequests("rate limited", headers={"x-rate-limit-reset": reset})
+    assert 58 <= scraper.retry_delay(error) <= 60
+
+
+def test_retry_delay_falls_back_to_full_window(scraper):
+    assert scraper.retry_delay(TooManyRequests("rate limited")) == 900
+    assert scraper.retry_delay(SimpleNamespace(headers={})) == 900
+
+
+def test_request_halves_rate_on_too_many_requests(scraper):
+    scraper.max_retries = 0
+    rate = scraper.rate
+
+    async def rate_limited():
+        raise TooManyRequests("rate limited", headers={"retry-after": "120"})
+
+    with pytest.raises(TooManyRequests):
+        asyncio.run(scraper._request(rate_limited))
+
+    assert scraper.rate == rate * scraper.rate_decrease
+    assert scraper.tokens == 0
+    assert 119 <= scraper._reset_mono - time.monotonic() <= 120
+
+
+def test_request_grows_rate_on_success_up_to_max(scraper):
+    scraper.rate = scraper.rate_min
+
+    async def ok():
+        return "page"
+
+    assert asyncio.run(scraper._request(ok)) == "page"
+    assert scraper.rate == pytest.approx(
+        scraper.rate_min * scraper.rate_increase + scraper.rate_increment
+    )
+
+    scraper.rate = scraper.rate_max
+    asyncio.run(scraper._request(ok))
+    assert scraper.rate == scraper.rate_max
+
+
+def test_rate_state_round_trip(scraper):
+    scraper.tokens = 3.0
+    scraper.rate = 0.03
+    scraper._reset_mono = time.monotonic() + 120
+    scraper.save_rate_state(force=True)
+
+    restored = TwitterScraper()
+    restored.refill_tokens()
+    assert restored.tokens == pytest.approx(3.0, abs=0.1)
+    assert restored.rate == 0.03
+    assert 118 <= restored._reset_mono - time.monotonic() <= 120
+
+
+def test_stale_rate_state_is_ignored(scraper):
+    with open(scraper.rate_state_file, "w") as f:
+        json.dump(
+            {"tokens": 0, "rate": 0.03, "saved_at": time.time() - 1000, "reset_at": 0},
+            f,
+        )
+
+    restored = TwitterScraper()
+    assert restored.tokens == restored.capacity
+    assert restored.rate == restored.capacity / 900.0
+    assert restored._reset_mono == 0.0
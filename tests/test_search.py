@@ -0,0 +1,60 @@
+import asyncio
+import csv
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("twikit")
+pytest.importorskip("dotenv")
+
+import twitter_scraper
+from twitter_scraper import TwitterScraper
+
+
+def make_tweet(tweet_id):
+    return SimpleNamespace(
+        id=str(tweet_id),
+        text=f"tweet {tweet_id}",
+        created_at="",
+        user=SimpleNamespace(id="1", name="alice"),
+        retweet_count=0,
+        favorite_count=0,
+        reply_count=0,
+        media=[],
+        urls=[],
+    )
+
+
+class FailingPage(list):
+    """A results page whose next page fails with a non-twikit error"""
+
+    async def next(self):
+        raise TimeoutError("read timed out")
+
+
+class FakeClient:
+    async def search_tweet(self, keyword, product):
+        return FailingPage([make_tweet(1), make_tweet(2)])
+
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(twitter_scraper.random, "uniform", lambda a, b: 0)
+    scraper = TwitterScraper()
+    scraper.client = FakeClient()
+    return scraper
+
+
+def test_failed_page_fetch_ends_search_normally(scraper, capsys):
+    asyncio.run(scraper.search_tweets("test", max_tweets=10))
+
+    output = capsys.readouterr().out
+    assert "Error during search: read timed out" in output
+    assert "Completed! Total tweets collected: 2" in output
+
+    # The tweets collected before the error are still saved
+    (path,) = (scraper.output_dir).glob("tweets_test_*.csv")
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert [row[0] for row in rows[1:]] == ["1", "2"]
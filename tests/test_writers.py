@@ -0,0 +1,86 @@
+import asyncio
+import csv
+import json
+
+import pytest
+
+pytest.importorskip("twikit")
+pytest.importorskip("dotenv")
+
+from twitter_scraper import (
+    COLUMNS,
+    CSVTweetWriter,
+    JSONLTweetWriter,
+    ParquetTweetWriter,
+)
+
+ROWS = [
+    (
+        "1",
+        "first",
+        "Mon Jan 01 00:00:00 +0000 2024",
+        "10",
+        "alice",
+        1,
+        2,
+        3,
+        ("http://p?format=jpg&name=large", "http://v|weird"),
+        ("http://a?x=1|2",),
+        True,
+        ("photo", "video"),
+    ),
+    ("2", "second", "", "11", "bob", 0, 0, 0, (), (), False, ()),
+]
+
+
+async def write_rows(writer_class, path, flush_interval=1):
+    writer = writer_class(path, flush_interval)
+    for row in ROWS:
+        await writer.put(row)
+    await writer.close()
+    return writer
+
+
+def expected_records():
+    records = [dict(zip(COLUMNS, row)) for row in ROWS]
+    for record in records:
+        for column in ("media_urls", "urls", "media_types"):
+            record[column] = list(record[column])
+    return records
+
+
+def test_csv_writer_joins_lists(tmp_path):
+    path = tmp_path / "tweets.csv"
+    writer = asyncio.run(write_rows(CSVTweetWriter, path))
+
+    with open(path, newline="", encoding="utf-8") as f:
+        header, *rows = list(csv.reader(f))
+    assert tuple(header) == COLUMNS
+    assert rows[0][8:] == [
+        "http://p?format=jpg&name=large|http://v|weird",
+        "http://a?x=1|2",
+        "True",
+        "photo|video",
+    ]
+    assert rows[1][8:] == ["", "", "False", ""]
+    assert writer.total == len(ROWS)
+
+
+def test_jsonl_writer_keeps_lists(tmp_path):
+    path = tmp_path / "tweets.jsonl"
+    writer = asyncio.run(write_rows(JSONLTweetWriter, path))
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert records == expected_records()
+    assert writer.total == len(ROWS)
+
+
+def test_parquet_writer_round_trip(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "tweets.parquet"
+    asyncio.run(write_rows(ParquetTweetWriter, path))
+
+    parquet_file = pq.ParquetFile(path)
+    # One row group per flushed batch
+    assert parquet_file.num_row_groups == len(ROWS)
+    assert parquet_file.read().to_pylist() == expected_records()
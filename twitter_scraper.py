@@ -1,34 +1,259 @@
 import asyncio
+import csv
+import json
 import os
 import random
 import time
+from abc import ABC, abstractmethod
 from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
 from dotenv import load_dotenv
-from tqdm import tqdm
 from twikit import Client
+from twikit.errors import TooManyRequests
+
+try:
+    import orjson
+except ImportError:  # Optional, only speeds up JSON Lines output
+    orjson = None
+
+COLUMNS = (
+    "id",
+    "text",
+    "created_at",
+    "author_id",
+    "author_username",
+    "retweet_count",
+    "like_count",
+    "reply_count",
+    "media_urls",  # List of media URLs (images, videos)
+    "urls",  # List of URLs mentioned in tweet
+    "has_media",  # Boolean indicating if tweet has media
+    "media_types",  # List of media types (photo, video, etc.)
+)
+
+# Columns holding lists of strings, joined with "|" in CSV output
+LIST_COLUMNS = ("media_urls", "urls", "media_types")
+
+WRITE_BUFFER_SIZE = 1 << 16  # 64 KB; batches are flushed explicitly
+
+
+def dumps_json(obj):
+    """Serialize obj to UTF-8 JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, ensure_ascii=False, default=str).encode()
+
+
+class TweetWriter(ABC):
+    """Writes tweet rows to a single output file from a background task"""
+
+    extension = None  # File extension, set by subclasses
+
+    def __init__(self, path, flush_interval, name=""):
+        self.path = path
+        self.flush_interval = flush_interval  # Rows to collect per write
+        self.name = name
+        self.total = 0
+        self.open()
+
+        # Pending tweets are kept column-wise (one list per column) so they can
+        # be handed to columnar writers as is
+        self._columns = {column: [] for column in COLUMNS}
+
+        # Rows are handed over through a queue and written from a worker
+        # thread, so disk writes overlap with the searches' network waits
+        self._queue = asyncio.Queue(maxsize=2048)
+        self._task = asyncio.create_task(self._writer_loop())
+
+    async def put(self, row):
+        """Queue a tweet row for writing"""
+        if self._task.done():
+            # The writer failed, surface its error instead of blocking
+            await self._task
+        await self._queue.put(row)
+
+    @abstractmethod
+    def open(self):
+        """Open the output file"""
+
+    @abstractmethod
+    def write_columns(self, columns):
+        """Write a batch, given as a dict of column lists, and flush it"""
+
+    def close_file(self):
+        """Close the output file"""
+        self._fh.close()
+
+    async def save_batch(self):
+        """Save the pending tweets to the output file"""
+        count = len(self._columns["id"])
+        if not count:
+            return
+
+        # Hand the filled columns to a worker thread and collect into new ones
+        columns = self._columns
+        self._columns = {column: [] for column in COLUMNS}
+        await asyncio.to_thread(self.write_columns, columns)
+        self.total += count
+        print(f"[{self.name}] Collected and saved {self.total} tweets...")
+
+    async def _writer_loop(self):
+        """Collect queued rows and save them every flush_interval rows"""
+        pending = 0
+        while True:
+            row = await self._queue.get()
+            if row is None:
+                break
+            for values, value in zip(self._columns.values(), row):
+                values.append(value)
+            pending += 1
+            if pending >= self.flush_interval:
+                await self.save_batch()
+                pending = 0
+
+        # Save any remaining tweets
+        await self.save_batch()
+
+    async def close(self):
+        """Save any queued tweets and close the output file"""
+        try:
+            if not self._task.done():
+                await self._queue.put(None)
+            await self._task
+        finally:
+            self.close_file()
+
+
+class CSVTweetWriter(TweetWriter):
+    """Writes tweets to a CSV file, with list columns joined by pipes"""
+
+    extension = "csv"
+
+    def open(self):
+        # Keep the file open and write the header row once
+        self._fh = open(
+            self.path, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER_SIZE
+        )
+        self._writer = csv.writer(self._fh)
+        self._writer.writerow(COLUMNS)
+
+    def write_columns(self, columns):
+        columns = dict(columns)
+        for column in LIST_COLUMNS:
+            columns[column] = ["|".join(values) for values in columns[column]]
+        self._writer.writerows(zip(*columns.values()))
+        self._fh.flush()
+
+
+class JSONLTweetWriter(TweetWriter):
+    """Writes tweets to a JSON Lines file, one object per tweet
+
+    Unlike CSV, numbers and booleans keep their types and list columns are
+    written as JSON arrays.
+    """
+
+    extension = "jsonl"
+
+    def open(self):
+        self._fh = open(self.path, "wb", buffering=WRITE_BUFFER_SIZE)
+
+    def write_columns(self, columns):
+        lines = []
+        for row in zip(*columns.values()):
+            lines.append(dumps_json(dict(zip(COLUMNS, row))))
+        lines.append(b"")
+        self._fh.write(b"\n".join(lines))
+        self._fh.flush()
+
+
+class ParquetTweetWriter(TweetWriter):
+    """Writes tweets to a zstd-compressed Parquet file, one row group per batch
+
+    Suited to large collections: the file is much smaller than CSV and column
+    types are preserved. Requires pyarrow.
+    """
+
+    extension = "parquet"
+
+    def open(self):
+        # Optional dependency, only imported when Parquet output is requested
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema(
+            [
+                ("id", pa.string()),
+                ("text", pa.string()),
+                ("created_at", pa.string()),
+                ("author_id", pa.string()),
+                ("author_username", pa.string()),
+                ("retweet_count", pa.int64()),
+                ("like_count", pa.int64()),
+                ("reply_count", pa.int64()),
+                ("media_urls", pa.list_(pa.string())),
+                ("urls", pa.list_(pa.string())),
+                ("has_media", pa.bool_()),
+                ("media_types", pa.list_(pa.string())),
+            ]
+        )
+        # Keep the writer open so each batch is appended as a row group
+        self._writer = pq.ParquetWriter(self.path, self._schema, compression="zstd")
+
+    def write_columns(self, columns):
+        # The columns are fed in directly, no transposing needed
+        table = self._pa.Table.from_pydict(columns, schema=self._schema)
+        self._writer.write_table(table)
+
+    def close_file(self):
+        self._writer.close()
+
+
+WRITERS = {
+    writer.extension: writer
+    for writer in (CSVTweetWriter, JSONLTweetWriter, ParquetTweetWriter)
+}
 
 
 class TwitterScraper:
-    def __init__(self):
+    def __init__(self, max_concurrent_requests=2):
         load_dotenv()
         self.client = Client()
         self.cookies_file = "cookies.json"
 
-        # Rate limiting parameters
-        self.requests_count = 0
-        self.reset_time = time.time() + 900  # 15 minutes in seconds
-        self.max_requests = 45  # Keep it under 50 to be safe
+        # Rate limiting parameters (token bucket: 45 requests per 15 minutes)
+        self.capacity = 45  # Keep it under 50 to be safe
+        self.rate = self.capacity / 900.0  # Tokens refilled per second
+        self.tokens = float(self.capacity)
+        self.last_refill = time.monotonic()
+        # Monotonic time until which the server asked us to stop sending
+        self._reset_mono = 0.0
+
+        # Adaptive rate parameters (AIMD: grow on success, halve on 429)
+        self.rate_max = self.capacity / 900.0  # Never exceed the safe 45 per window
+        self.rate_min = 1 / 60  # Never drop below one request per minute
+        self.rate_increase = 1.05
+        self.rate_increment = 1e-4
+        self.rate_decrease = 0.5
+        self.max_retries = 3
+
+        # Limiter state is persisted so restarts don't reset the quota
+        self.rate_state_file = "rate_state.json"
+        self.rate_state_max_age = 900  # Ignore state older than 15 minutes
+        self.last_state_save = 0.0
+        self.load_rate_state()
+
+        # Cap on in-flight API calls shared by all concurrent searches
+        self.semaphore = asyncio.Semaphore(max_concurrent_requests)
 
         # Create output directory
         self.output_dir = Path("output")
         self.output_dir.mkdir(exist_ok=True)
 
-        # Initialize CSV file
-        self.current_file = None
-        self.df = None
+        self.batch_size = 1000  # Tweets to collect before flushing to disk
+        # Searches up to this size are written in a single batch at the end
+        self.flush_threshold = 5000
 
     async def setup_client(self):
         """Setup client with login or cookies"""
@@ -54,173 +279,299 @@ class TwitterScraper:
         self.client.save_cookies(self.cookies_file)
         print("Logged in and saved cookies")
 
-    def check_rate_limit(self):
-        """Check and handle rate limiting with optimized delays"""
-        current_time = time.time()
-
-        # Reset counter if 15 minutes have passed
-        if current_time > self.reset_time:
-            self.requests_count = 0
-            self.reset_time = current_time + 900
-
-        # If we've hit the limit, wait until reset
-        if self.requests_count >= self.max_requests:
-            wait_time = self.reset_time - current_time
-            print(f"\nRate limit reached. Waiting {wait_time:.2f} seconds...")
-
-            # Show progress bar during wait
-            with tqdm(total=int(wait_time), desc="Rate limit cooldown") as pbar:
-                while time.time() < self.reset_time:
-                    time.sleep(1)
-                    pbar.update(1)
-
-            self.requests_count = 0
-            self.reset_time = time.time() + 900
-
-        # Add randomized cooldown between requests (10-20 seconds)
-        # This helps avoid hitting rate limits too quickly
-        cooldown = random.uniform(10, 17)
-        time.sleep(cooldown)
-        self.requests_count += 1
-
-    def init_csv(self, keyword):
-        """Initialize CSV file for incremental saving"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.current_file = self.output_dir / f"tweets_{keyword}_{timestamp}.csv"
-        # Create empty DataFrame with correct columns
-        self.df = pd.DataFrame(
-            columns=[
-                "id",
-                "text",
-                "created_at",
-                "author_id",
-                "author_username",
-                "retweet_count",
-                "like_count",
-                "reply_count",
-                "media_urls",  # List of media URLs (images, videos)
-                "urls",  # List of URLs mentioned in tweet
-                "has_media",  # Boolean indicating if tweet has media
-                "media_types",  # List of media types (photo, video, etc.)
-            ]
-        )
-        # Save empty DataFrame to create file with headers
-        self.df.to_csv(self.current_file, index=False)
-        print(f"Initialized output file: {self.current_file}")
-
-    def save_tweets_batch(self, tweets_batch):
-        """Save a batch of tweets to CSV"""
-        if not tweets_batch:
+    def load_rate_state(self):
+        """Restore the limiter state saved by a recent run"""
+        if not os.path.exists(self.rate_state_file):
             return
 
-        df_batch = pd.DataFrame(tweets_batch)
-        df_batch.to_csv(self.current_file, mode="a", header=False, index=False)
+        try:
+            with open(self.rate_state_file) as f:
+                state = json.load(f)
+
+            # Resume a server cooldown that is still running
+            cooldown = state.get("reset_at", 0) - time.time()
+            if cooldown > 0:
+                self._reset_mono = time.monotonic() + cooldown
+                print(f"Resuming server cooldown ({cooldown:.0f} seconds left)")
 
-    async def search_tweets(self, keyword, max_tweets=100):
-        """Search for tweets containing the keyword"""
+            age = time.time() - state["saved_at"]
+            if not 0 <= age <= self.rate_state_max_age:
+                return
+
+            self.rate = min(self.rate_max, max(self.rate_min, state["rate"]))
+            self.tokens = min(self.capacity, state["tokens"])
+            # Refill for the time that passed since the state was saved
+            self.last_refill = time.monotonic() - age
+            print(f"Loaded rate limiter state ({self.tokens:.1f} tokens left)")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error loading rate limiter state: {e}")
+
+    def save_rate_state(self, force=False):
+        """Save the limiter state, at most once per second unless forced"""
+        now = time.monotonic()
+        if not force and now - self.last_state_save < 1:
+            return
+        self.last_state_save = now
+
+        state = {
+            "tokens": self.tokens,
+            "rate": self.rate,
+            # Wall-clock time, since monotonic clocks don't survive restarts
+            "saved_at": time.time() - (now - self.last_refill),
+            # End of any server cooldown, also as wall-clock time
+            "reset_at": time.time() + (self._reset_mono - now),
+        }
+        try:
+            with open(self.rate_state_file, "w") as f:
+                json.dump(state, f)
+        except OSError as e:
+            print(f"Error saving rate limiter state: {e}")
+
+    def refill_tokens(self):
+        """Add the tokens accrued since the last refill, up to capacity"""
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.last_refill = now
+
+    async def wait_until(self, deadline):
+        """Sleep until the given time.monotonic() deadline, showing progress"""
+        # Only needed on this rare path, so keep it out of startup
+        from tqdm import tqdm
+
+        wait_time = deadline - time.monotonic()
+        print(f"\nRate limit reached. Waiting {wait_time:.2f} seconds...")
+
+        # Show progress bar during wait
+        with tqdm(total=int(wait_time), desc="Rate limit cooldown") as pbar:
+            while (remaining := deadline - time.monotonic()) > 0:
+                await asyncio.sleep(min(1, remaining))
+                pbar.update(1)
+
+    async def check_rate_limit(self):
+        """Take a token from the bucket, waiting only when it is empty"""
+        # Wait out any cooldown imposed by the server first
+        if self._reset_mono > time.monotonic():
+            await self.wait_until(self._reset_mono)
+
+        self.refill_tokens()
+
+        # If the bucket is empty, wait until a full token has accrued
+        while self.tokens < 1:
+            await self.wait_until(time.monotonic() + (1 - self.tokens) / self.rate)
+            self.refill_tokens()
+
+        self.tokens -= 1
+
+        # Small random jitter so requests don't go out on a fixed cadence
+        await asyncio.sleep(random.uniform(0, 0.5))
+
+    def retry_delay(self, error):
+        """Seconds to wait after a TooManyRequests error, as told by the server"""
+        headers = error.headers or {}
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+
+        # twikit parses x-rate-limit-reset (epoch seconds) into the exception
+        reset = getattr(error, "rate_limit_reset", None)
+        if reset:
+            return max(0.0, reset - time.time())
+
+        # No hint from the server, wait out a full 15 minute window
+        return 900.0
+
+    async def _request(self, func, *args, **kwargs):
+        """Make a rate-limited API call, adapting the rate to the server quota"""
+        for attempt in range(self.max_retries + 1):
+            await self.check_rate_limit()
+            try:
+                async with self.semaphore:
+                    result = await func(*args, **kwargs)
+            except TooManyRequests as e:
+                # Back off: halve the rate and empty the bucket
+                self.rate = max(self.rate_min, self.rate * self.rate_decrease)
+                self.tokens = 0
+                print(
+                    f"\nToo many requests. Lowering rate to "
+                    f"{self.rate * 900:.1f} requests per 15 minutes"
+                )
+
+                # Every search waits for the cooldown in check_rate_limit
+                wait_time = self.retry_delay(e) + random.uniform(0, 1)
+                self._reset_mono = max(self._reset_mono, time.monotonic() + wait_time)
+                self.save_rate_state(force=True)
+
+                if attempt == self.max_retries:
+                    raise
+                continue
+
+            self.rate = min(
+                self.rate_max, self.rate * self.rate_increase + self.rate_increment
+            )
+            self.save_rate_state()
+            return result
+
+    def init_writer(self, keyword, flush_interval, output_format="csv"):
+        """Initialize output file for incremental saving"""
+        if output_format not in WRITERS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+
+        writer_class = WRITERS[output_format]
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        writer = writer_class(
+            self.output_dir / f"tweets_{keyword}_{timestamp}.{writer_class.extension}",
+            flush_interval,
+            name=keyword,
+        )
+        print(f"Initialized output file: {writer.path}")
+        return writer
+
+    async def search_tweets(
+        self, keyword, max_tweets=100, flush_interval=None, output_format="csv"
+    ):
+        """Search for tweets containing the keyword
+
+        flush_interval is the number of tweets to collect before each write.
+        By default small searches are written once at the end and larger
+        ones every batch_size tweets. output_format is "csv", "jsonl" or
+        "parquet".
+        """
         print(f"Searching for tweets containing '{keyword}'...")
-        self.init_csv(keyword)
 
-        tweets_batch = []
+        if flush_interval is None:
+            if max_tweets <= self.flush_threshold:
+                flush_interval = max_tweets
+            else:
+                flush_interval = self.batch_size
+
+        writer = self.init_writer(keyword, flush_interval, output_format)
         total_tweets = 0
 
+        next_task = None
+
         try:
             # Initial search
-            self.check_rate_limit()
-            result = await self.client.search_tweet(keyword, product="Top")
+            result = await self._request(
+                self.client.search_tweet, keyword, product="Top"
+            )
 
             while result and total_tweets < max_tweets:
+                # Fetch the next page in the background while this one is
+                # processed, unless this page already reaches max_tweets
+                if total_tweets + len(result) < max_tweets:
+                    next_task = asyncio.create_task(self._request(result.next))
+
                 # Process current batch of tweets
                 for tweet in result:
-                    # Extract media information
-                    media_urls = []
-                    media_types = []
-                    has_media = False
-
-                    # Check media attribute directly
-                    if hasattr(tweet, "media"):
-                        for media in tweet.media:
-                            media_type = getattr(media, "type", "")
-                            media_types.append(media_type)
-                            has_media = True
+                    # Look up each attribute once
+                    user = tweet.user
+                    url_entities = getattr(tweet, "urls", ()) or ()
 
+                    # Extract media information
+                    # twikit media objects always define these attributes
+                    try:
+                        media = tweet.media or ()
+                        media_types = [item.type for item in media]
+                        media_urls = []
+                        for item, media_type in zip(media, media_types):
                             # Handle different media types
                             if media_type == "photo":
                                 # Get the photo URL
-                                media_url = getattr(media, "media_url", "None")
+                                media_url = item.media_url
                                 if media_url:
                                     media_urls.append(
                                         f"{media_url}?format=jpg&name=large"
                                     )
-                            elif media_type in ["video", "animated_gif"]:
+                            elif media_type in ("video", "animated_gif"):
                                 # For videos and GIFs, get the stream
-                                if hasattr(media, "streams"):
+                                streams = item.streams
+                                if streams:
                                     # Get the last stream (usually highest quality)
-                                    media_urls.append(media.streams[-1].url) # type:ignore
+                                    media_urls.append(streams[-1].url)
+                    except AttributeError as e:
+                        # Malformed media, keep the tweet without it
+                        print(f"[{keyword}] Skipping media of tweet {tweet.id}: {e}")
+                        media_urls = []
+                        media_types = []
+
+                    has_media = bool(media_types)
 
                     # Extract URLs from tweet
-                    urls = []
-                    if hasattr(tweet, "urls"):
-                        for url_entity in tweet.urls:
-                            expanded_url = getattr(url_entity, "expanded_url", "")
-                            if expanded_url:
-                                urls.append(expanded_url)
-
-                    tweet_data = {
-                        "id": tweet.id,
-                        "text": tweet.text,
-                        "created_at": tweet.created_at,
-                        "author_id": tweet.user.id,
-                        "author_username": tweet.user.name,
-                        "retweet_count": tweet.retweet_count,
-                        "like_count": tweet.favorite_count,
-                        "reply_count": tweet.reply_count,
-                        "media_urls": "|".join(media_urls) if media_urls else "",
-                        "urls": "|".join(urls) if urls else "",
-                        "has_media": has_media,
-                        "media_types": "|".join(media_types) if media_types else "",
-                    }
-                    tweets_batch.append(tweet_data)
+                    urls = [
+                        expanded_url
+                        for url_entity in url_entities
+                        if (expanded_url := getattr(url_entity, "expanded_url", ""))
+                    ]
+
+                    # Row values in COLUMNS order
+                    await writer.put(
+                        (
+                            tweet.id,
+                            tweet.text,
+                            tweet.created_at,
+                            user.id,
+                            user.name,
+                            tweet.retweet_count,
+                            tweet.favorite_count,
+                            tweet.reply_count,
+                            media_urls,
+                            urls,
+                            has_media,
+                            media_types,
+                        )
+                    )
                     total_tweets += 1
 
-                    # Save in batches of 20 tweets
-                    if len(tweets_batch) >= 20:
-                        self.save_tweets_batch(tweets_batch)
-                        tweets_batch = []
-                        print(f"Collected and saved {total_tweets} tweets...")
-
                     if total_tweets >= max_tweets:
                         break
 
                 # If we haven't reached max_tweets, get next page
                 if total_tweets < max_tweets:
-                    self.check_rate_limit()
-                    result = await result.next()  # Get next page of results
+                    if next_task is None:
+                        next_task = asyncio.create_task(self._request(result.next))
+                    # Take the task out first, so cleanup never awaits it again
+                    task, next_task = next_task, None
+                    result = await task
                     if not result:
-                        print("No more tweets available")
+                        print(f"[{keyword}] No more tweets available")
                         break
 
-            # Save any remaining tweets
-            if tweets_batch:
-                self.save_tweets_batch(tweets_batch)
-                print(f"Collected and saved {total_tweets} tweets...")
-
         except Exception as e:
-            print(f"Error during search: {e}")
-            # Save any remaining tweets in case of error
-            if tweets_batch:
-                self.save_tweets_batch(tweets_batch)
-
-        print(f"\nCompleted! Total tweets collected: {total_tweets}")
-        print(f"Results saved to: {self.current_file}")
+            print(f"[{keyword}] Error during search: {e}")
+        finally:
+            try:
+                # Don't leave an unused prefetch running. asyncio.wait doesn't
+                # raise the task's error but still lets a cancellation of this
+                # search through
+                if next_task is not None:
+                    next_task.cancel()
+                    await asyncio.wait([next_task])
+                    if not next_task.cancelled():
+                        # Retrieve the error so it isn't reported as unhandled
+                        next_task.exception()
+            finally:
+                # Save any remaining tweets, also in case of error
+                await writer.close()
+                # Debounced saves may have skipped the latest limiter state
+                self.save_rate_state(force=True)
+
+        print(f"\n[{keyword}] Completed! Total tweets collected: {total_tweets}")
+        print(f"[{keyword}] Results saved to: {writer.path}")
 
 
 async def main():
     scraper = TwitterScraper()
     await scraper.setup_client()
-    keyword = "disaster"
+    keywords = ["disaster"]
     max_tweets = 1000
-    await scraper.search_tweets(keyword, max_tweets)
+    # Each keyword gets its own output file; all share one rate limiter
+    await asyncio.gather(
+        *[scraper.search_tweets(keyword, max_tweets) for keyword in keywords]
+    )
 
 
 if __name__ == "__main__":